@@ -0,0 +1,62 @@
+"""
+Compare two run_benchmarks.py JSON files and flag regressions.
+
+Usage:
+    python benchmarks/compare_benchmarks.py base.json new.json --threshold 0.10
+
+Exits with status 1 if any benchmark's statistic grew by more than the threshold.
+"""
+import argparse
+import json
+import sys
+
+
+def load_results(path: str) -> dict:
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def compare(base: dict, new: dict, stat: str, threshold: float) -> int:
+    base_results = base["results"]
+    new_results = new["results"]
+    print(f"Base: {base['metadata'].get('commit', 'unknown')[:12]}  New: {new['metadata'].get('commit', 'unknown')[:12]}  "
+          f"stat={stat} threshold={threshold:.0%}\n")
+    print(f"{'benchmark':<50} {'base ms':>12} {'new ms':>12} {'change':>9}")
+
+    regressions = 0
+    for name in sorted(set(base_results) | set(new_results)):
+        if name not in base_results or name not in new_results:
+            where = "base" if name not in base_results else "new"
+            print(f"{name:<50} {'missing in ' + where:>35}")
+            continue
+        old_value = base_results[name][stat]
+        new_value = new_results[name][stat]
+        change = (new_value - old_value) / old_value if old_value else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        elif change < -threshold:
+            flag = "  improved"
+        print(f"{name:<50} {old_value * 1000:12.4f} {new_value * 1000:12.4f} {change:+9.1%}{flag}")
+
+    print(f"\n{regressions} regression(s)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("base", type=str, help="Baseline results JSON")
+    parser.add_argument("new", type=str, help="New results JSON")
+    parser.add_argument("--stat", type=str, default="median_s", choices=["min_s", "median_s", "mean_s", "p90_s"],
+                        help="Statistic to compare (default: median_s)")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Relative slowdown counted as a regression (default: 0.10)")
+    args = parser.parse_args()
+
+    regressions = compare(load_results(args.base), load_results(args.new), args.stat, args.threshold)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""
+Reproducible benchmarks for the orchestrator and RAG hot paths.
+
+Usage:
+    python benchmarks/run_benchmarks.py --output bench_results.json
+    python benchmarks/run_benchmarks.py --only rag --scales 1,4
+    python benchmarks/compare_benchmarks.py base.json new.json
+
+All inputs are generated from fixed seeds and the RAG benchmarks use a deterministic
+hashing embedder, so no Ollama instance is needed and runs are comparable across commits.
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+SEED = 1234
+
+
+# # # # # # # # # # # # # # # # # # # #
+# Harness # # # # # # # # # # # # # # #
+# # # # # # # # # # # # # # # # # # # #
+
+def bench(name: str, fn: Callable[[], object], repeat: int, warmup: int = 2, params: Dict = None) -> Dict:
+    """Time fn() `repeat` times after `warmup` untimed calls"""
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    result = {
+        "name": name,
+        "params": params or {},
+        "iterations": repeat,
+        "min_s": timings[0],
+        "median_s": statistics.median(timings),
+        "mean_s": statistics.fmean(timings),
+        "stdev_s": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        "p90_s": timings[min(len(timings) - 1, int(0.9 * len(timings)))],
+        "max_s": timings[-1],
+    }
+    print(f"{name:<50} median={result['median_s'] * 1000:10.4f} ms  min={result['min_s'] * 1000:10.4f} ms  n={repeat}")
+    return result
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+# # # # # # # # # # # # # # # # # # # #
+# Orchestrator benchmarks # # # # # # #
+# # # # # # # # # # # # # # # # # # # #
+
+def synthetic_catalog(blocks: List[str], size: int, rng: random.Random,
+                      params_per_block: int = 8) -> List[List[Tuple[str, str]]]:
+    """
+    Random catalog of `size` distinct processes. The real block/sub-param space has
+    only 3^5 = 243 sequences, so synthetic sub-params ("<block>-v<i>") are used to
+    make params_per_block^5 sequences available and keep every entry unique.
+    """
+    space = params_per_block ** len(blocks)
+    if size > space:
+        raise ValueError(f"Cannot draw {size} distinct processes from {space} sequences")
+    catalog = []
+    for code in rng.sample(range(space), size):
+        process = []
+        for block in blocks:
+            code, param_idx = divmod(code, params_per_block)
+            process.append((block, f"{block}-v{param_idx}"))
+        catalog.append(process)
+    return catalog
+
+
+def bench_orchestrator(repeat: int) -> List[Dict]:
+    from orchestrator_gui import OrchestratorApp
+    import orchestrator_fastmcp_server as server
+    from processes import VALID_PROCESSES
+
+    results = []
+    rng = random.Random(SEED)
+
+    # check_process against synthetic catalogs of distinct processes. match_process looks the
+    # sequence up in an index built once per catalog, so "last" and "none" measure the lookup;
+    # "rebuild" swaps in a fresh catalog list on every call to time the index rebuild too.
+    for size in (9, 100, 1000, 10000):
+        app = OrchestratorApp(headless=True)
+        catalog = synthetic_catalog(list(app.block_sub_params), size, rng)
+        target = catalog[-1]
+        app.blocks = [block for block, _ in target]
+        app.sub_params = [param for _, param in target]
+        app.valid_processes = catalog
+        results.append(bench(f"check_process[catalog={size},match=last]", app.check_process,
+                             repeat, params={"catalog_size": size, "match": "last"}))
+        app.valid_processes = catalog[:-1]
+        results.append(bench(f"check_process[catalog={size},match=none]", app.check_process,
+                             repeat, params={"catalog_size": size - 1, "match": "none"}))
+
+        def check_process_rebuild():
+            app.valid_processes = list(catalog)
+            return app.check_process()
+
+        results.append(bench(f"check_process[catalog={size},rebuild]", check_process_rebuild,
+                             repeat, params={"catalog_size": size, "match": "last", "rebuild_index": True}))
+
+    # set_whole_process end-to-end through the MCP tool function, alternating two valid processes
+    server.app_instance = OrchestratorApp(headless=True)
+    sequences = [[param for _, param in VALID_PROCESSES[0]], [param for _, param in VALID_PROCESSES[1]]]
+    state = {"i": 0}
+
+    def set_whole_process():
+        state["i"] ^= 1
+        return server.set_whole_process(sequences[state["i"]])
+
+    results.append(bench("set_whole_process[headless]", set_whole_process, repeat, params={"headless": True}))
+    return results
+
+
+# # # # # # # # # # # # # # # # # # # #
+# RAG benchmarks  # # # # # # # # # # #
+# # # # # # # # # # # # # # # # # # # #
+
+def make_stub_embeddings(dim: int = 256):
+    """Deterministic hashing embedder (signed bag of words), independent of PYTHONHASHSEED"""
+    from langchain_core.embeddings import Embeddings
+
+    class StubEmbeddings(Embeddings):
+        def _embed(self, text: str) -> List[float]:
+            vec = [0.0] * dim
+            for token in text.lower().split():
+                h = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+                vec[h % dim] += 1.0 if (h >> 32) & 1 else -1.0
+            norm = math.sqrt(sum(v * v for v in vec)) or 1.0
+            return [v / norm for v in vec]
+
+        def embed_documents(self, texts: List[str]) -> List[List[float]]:
+            return [self._embed(text) for text in texts]
+
+        def embed_query(self, text: str) -> List[float]:
+            return self._embed(text)
+
+    return StubEmbeddings()
+
+
+def scaled_documents_dir(scale: int, workdir: Path) -> Path:
+    """Copy documents/*.md `scale` times into a fresh directory"""
+    target = workdir / f"documents_x{scale}"
+    target.mkdir(parents=True, exist_ok=True)
+    for copy in range(scale):
+        for source in sorted((REPO_ROOT / "documents").glob("*.md")):
+            shutil.copy(source, target / f"{source.stem}_copy{copy}.md")
+    return target
+
+
+BENCH_QUERIES = [
+    "lead-free solder paste for consumer electronics",
+    "boundary-scan testing for military grade boards",
+    "3D optical inspection high precision placement",
+    "low temperature soldering for flexible wearables",
+    "who invented the automotive production process",
+]
+
+
+def bench_rag(repeat: int, scales: List[int], workdir: Path) -> List[Dict]:
+    from langchain_core.documents import Document
+    from rag_fastmcp_server import ProcessRAG
+    from responses import COMPACT
+
+    results = []
+    for scale in scales:
+        documents_dir = scaled_documents_dir(scale, workdir)
+        rag = ProcessRAG(documents_dir=documents_dir, persist_directory=str(workdir / f"chroma_x{scale}"))
+        rag.embeddings = make_stub_embeddings()
+
+        results.append(bench(f"load_documents[scale={scale}]", rag.load_documents,
+                             max(1, repeat // 10), warmup=1, params={"scale": scale}))
+        documents = rag.load_documents()
+        results.append(bench(f"chunk_documents[scale={scale}]", lambda: rag.chunk_documents(documents),
+                             max(1, repeat // 10), warmup=1, params={"scale": scale}))
+
+        rag.initialize(force_reload=True)
+        state = {"i": 0}
+
+        def search():
+            state["i"] = (state["i"] + 1) % len(BENCH_QUERIES)
+            return rag.search(BENCH_QUERIES[state["i"]], k=2)
+
+        results.append(bench(f"search[scale={scale},k=2]", search, repeat, params={"scale": scale, "k": 2}))
+
+        def search_diverse():
+            state["i"] = (state["i"] + 1) % len(BENCH_QUERIES)
+            return rag.search(BENCH_QUERIES[state["i"]], k=2, diverse=True, max_per_process=1)
+
+        results.append(bench(f"search[scale={scale},k=2,diverse]", search_diverse, repeat,
+                             params={"scale": scale, "k": 2, "diverse": True}))
+
+    # Compact formatting under a budget, on chunks full of characters that JSON escapes.
+    # The trimmed output must fill the budget to within one escape sequence.
+    chunk = ('Paste "SAC305"\n' * 40)[:540]
+    documents = [Document(page_content=chunk, metadata={"process_name": f"Process {i}"}) for i in range(3)]
+    for max_chars in (500, 1000):
+        formatted = ProcessRAG.format_results(documents, response_format=COMPACT, max_chars=max_chars)
+        if not max_chars - len('\\"') <= len(formatted) <= max_chars:
+            raise AssertionError(f"compact output is {len(formatted)} chars for max_chars={max_chars}")
+        results.append(bench(f"format_results[compact,max_chars={max_chars}]",
+                             lambda: ProcessRAG.format_results(documents, response_format=COMPACT, max_chars=max_chars),
+                             repeat, params={"response_format": COMPACT, "max_chars": max_chars}))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark orchestrator and RAG hot paths")
+    parser.add_argument("--output", type=str, default="bench_results.json", help="JSON results file")
+    parser.add_argument("--repeat", type=int, default=200, help="Timed iterations per benchmark (default: 200)")
+    parser.add_argument("--scales", type=str, default="1,4,16", help="Comma-separated document copy counts")
+    parser.add_argument("--only", type=str, choices=["orchestrator", "rag"], default=None,
+                        help="Run only one benchmark group")
+    args = parser.parse_args()
+
+    scales = [int(s) for s in args.scales.split(",") if s]
+    results = []
+    if args.only in (None, "orchestrator"):
+        results += bench_orchestrator(args.repeat)
+    if args.only in (None, "rag"):
+        workdir = Path(tempfile.mkdtemp(prefix="mcp_bench_"))
+        try:
+            results += bench_rag(args.repeat, scales, workdir)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    output = {
+        "metadata": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "scales": scales,
+            "seed": SEED,
+            "metrics_enabled": os.getenv("METRICS_ENABLED", "true"),
+        },
+        "results": {result["name"]: result for result in results},
+    }
+    with open(args.output, "w") as f:
+        json.dump(output, f, indent=2)
+    print(f"Wrote {len(results)} results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+import mmap
+import os
+import struct
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+from typing import BinaryIO, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Segment file layout: fixed header followed by `capacity` fixed-size records
+# Header: magic, version, record size, capacity, record count
+HEADER = struct.Struct("<4sHHII")
+HEADER_SIZE = 64
+MAGIC = b"PCBX"
+VERSION = 1
+
+# Record: timestamp (us since epoch), process id (0 = no valid process), line id, success flag,
+# one byte per step encoding (block index * 4 + sub-param index), padding to 32 bytes
+RECORD = struct.Struct("<qhHB5B14x")
+RECORD_SIZE = RECORD.size
+UNKNOWN_STEP = 255
+
+
+class ExecutionRecord(NamedTuple):
+    timestamp: float
+    process_id: int
+    line_id: int
+    success: bool
+    steps: Tuple[int, ...]
+
+
+class _Segment:
+    """One memory-mapped, preallocated segment file of the journal"""
+
+    def __init__(self, path: Path, capacity: int):
+        self.path = path
+        if not path.exists() or self._is_blank(path):
+            self._create(path, capacity)
+        self._file = open(path, "r+b")
+        self.mm = mmap.mmap(self._file.fileno(), 0)
+
+        magic, version, record_size, capacity, count = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or version != VERSION or record_size != RECORD_SIZE:
+            self.mm.close()
+            self._file.close()
+            raise ValueError(f"'{path}' is not a version {VERSION} execution log segment")
+        self.capacity = capacity
+        self.count = count
+
+        # process id -> sorted record indices in this segment
+        self.positions: Dict[int, array] = {}
+        self._build_index()
+
+    @staticmethod
+    def _is_blank(path: Path) -> bool:
+        """True for a segment left without a header by a crash during creation (holds no records)"""
+        with open(path, "rb") as f:
+            head = f.read(HEADER.size)
+        return len(head) < HEADER.size or head[:len(MAGIC)] == bytes(len(MAGIC))
+
+    @staticmethod
+    def _create(path: Path, capacity: int):
+        """Write the header and preallocate under a temporary name, then move the file into place"""
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, RECORD_SIZE, capacity, 0))
+            f.truncate(HEADER_SIZE + capacity * RECORD_SIZE)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def _build_index(self, chunk: int = 4096):
+        """Scan the segment in chunks to build the process id index without copying it"""
+        with memoryview(self.mm) as view:
+            for chunk_start in range(0, self.count, chunk):
+                chunk_end = min(self.count, chunk_start + chunk)
+                records = view[HEADER_SIZE + chunk_start * RECORD_SIZE:HEADER_SIZE + chunk_end * RECORD_SIZE]
+                for offset, fields in enumerate(RECORD.iter_unpack(records)):
+                    self.positions.setdefault(fields[1], array("I")).append(chunk_start + offset)
+                records.release()
+
+    @property
+    def full(self) -> bool:
+        return self.count >= self.capacity
+
+    def append(self, timestamp_us: int, process_id: int, line_id: int, success: bool, steps: Sequence[int]):
+        RECORD.pack_into(self.mm, HEADER_SIZE + self.count * RECORD_SIZE,
+                         timestamp_us, process_id, line_id, int(success), *steps)
+        self.positions.setdefault(process_id, array("I")).append(self.count)
+        # Publish the record by bumping the header count only after it has been written
+        self.count += 1
+        HEADER.pack_into(self.mm, 0, MAGIC, VERSION, RECORD_SIZE, self.capacity, self.count)
+
+    def timestamp_us(self, index: int) -> int:
+        return struct.unpack_from("<q", self.mm, HEADER_SIZE + index * RECORD_SIZE)[0]
+
+    def read(self, index: int) -> ExecutionRecord:
+        timestamp_us, process_id, line_id, success, *steps = RECORD.unpack_from(self.mm, HEADER_SIZE + index * RECORD_SIZE)
+        return ExecutionRecord(timestamp_us / 1_000_000, process_id, line_id, bool(success), tuple(steps))
+
+    def bisect_time(self, timestamp_us: int) -> int:
+        """Index of the first record at or after timestamp_us (records are time-ordered)"""
+        low, high = 0, self.count
+        while low < high:
+            mid = (low + high) // 2
+            if self.timestamp_us(mid) < timestamp_us:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+    def index_range(self, start_us: Optional[int], end_us: Optional[int]) -> Tuple[int, int]:
+        """Record index range [lo, hi) covering the time window [start_us, end_us)"""
+        lo = 0 if start_us is None else self.bisect_time(start_us)
+        hi = self.count if end_us is None else self.bisect_time(end_us)
+        return lo, hi
+
+    def close(self):
+        self.mm.flush()
+        self.mm.close()
+        self._file.close()
+
+
+def _lock_directory(path: Path) -> BinaryIO:
+    """Hold an exclusive lock on the lock file at path, failing at once if it is already held"""
+    handle = open(path, "a+b")
+    try:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        handle.close()
+        raise RuntimeError(f"Execution log '{path.parent}' is already open in another journal, "
+                           "give each writer its own directory") from None
+    return handle
+
+
+class ExecutionJournal:
+    """
+    Append-only execution log made of memory-mapped segment files of fixed-size records.
+
+    A directory has exactly one writer: record counts live in memory, so the journal
+    holds an exclusive lock on the directory while open. Segments rotate when full and
+    the oldest are deleted beyond max_segments. Each segment keeps an in-memory
+    process id -> record index map (4 bytes per record); time windows are resolved by binary search on the time-ordered records, so
+    queries only read the records they return.
+    """
+
+    def __init__(self, directory: str, records_per_segment: int = 65536, max_segments: int = 32):
+        self.directory = Path(directory)
+        self.records_per_segment = records_per_segment
+        self.max_segments = max_segments
+        self._lock = threading.Lock()
+        self._last_timestamp_us = 0
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock_file = _lock_directory(self.directory / "journal.lock")
+        self._segments: List[_Segment] = []
+        self._segment_numbers: List[int] = []
+        try:
+            for path in sorted(self.directory.glob("executions_*.bin")):
+                self._segments.append(_Segment(path, records_per_segment))
+                self._segment_numbers.append(int(path.stem.split("_")[1]))
+        except Exception:
+            self.close()
+            raise
+        if self._segments and self._segments[-1].count:
+            last = self._segments[-1]
+            self._last_timestamp_us = last.timestamp_us(last.count - 1)
+
+    def _current_segment(self) -> _Segment:
+        if not self._segments or self._segments[-1].full:
+            number = self._segment_numbers[-1] + 1 if self._segment_numbers else 0
+            self._segments.append(_Segment(self.directory / f"executions_{number:06d}.bin", self.records_per_segment))
+            self._segment_numbers.append(number)
+            while len(self._segments) > self.max_segments:
+                oldest = self._segments.pop(0)
+                self._segment_numbers.pop(0)
+                oldest.close()
+                os.remove(oldest.path)
+        return self._segments[-1]
+
+    def append(self, process_id: int, steps: Sequence[int], line_id: int = 0, success: bool = True,
+               timestamp: Optional[float] = None):
+        """Append one execution; steps are 5 step codes (see encode_step)"""
+        if len(steps) != 5:
+            raise ValueError("steps must contain exactly 5 step codes")
+        timestamp_us = int((time.time() if timestamp is None else timestamp) * 1_000_000)
+        with self._lock:
+            # Keep records time-ordered even if the wall clock steps backwards
+            timestamp_us = max(timestamp_us, self._last_timestamp_us)
+            self._current_segment().append(timestamp_us, process_id, line_id, success, steps)
+            self._last_timestamp_us = timestamp_us
+
+    def query(self, start: Optional[float] = None, end: Optional[float] = None,
+              process_id: Optional[int] = None, limit: int = 20) -> List[ExecutionRecord]:
+        """Most recent executions (newest first) in [start, end), optionally for one process id"""
+        start_us = None if start is None else int(start * 1_000_000)
+        end_us = None if end is None else int(end * 1_000_000)
+        results: List[ExecutionRecord] = []
+        with self._lock:
+            for segment in reversed(self._segments):
+                if limit > 0 and len(results) >= limit:
+                    break
+                if segment.count == 0:
+                    continue
+                if start_us is not None and segment.timestamp_us(segment.count - 1) < start_us:
+                    # Segments are time-ordered, every older one ends before start too
+                    break
+                lo, hi = segment.index_range(start_us, end_us)
+                if process_id is None:
+                    indices = range(hi - 1, lo - 1, -1)
+                else:
+                    positions = segment.positions.get(process_id, ())
+                    indices = reversed(positions[bisect_left(positions, lo):bisect_left(positions, hi)])
+                for index in indices:
+                    results.append(segment.read(index))
+                    if limit > 0 and len(results) >= limit:
+                        break
+        return results
+
+    def counts(self, start: Optional[float] = None, end: Optional[float] = None) -> Dict[int, int]:
+        """Number of executions per process id in [start, end), from the index only"""
+        start_us = None if start is None else int(start * 1_000_000)
+        end_us = None if end is None else int(end * 1_000_000)
+        totals: Dict[int, int] = {}
+        with self._lock:
+            for segment in self._segments:
+                if segment.count == 0:
+                    continue
+                lo, hi = segment.index_range(start_us, end_us)
+                if lo >= hi:
+                    continue
+                whole = lo == 0 and hi == segment.count
+                for process_id, positions in segment.positions.items():
+                    n = len(positions) if whole else bisect_left(positions, hi) - bisect_left(positions, lo)
+                    if n:
+                        totals[process_id] = totals.get(process_id, 0) + n
+        return dict(sorted(totals.items()))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(segment.count for segment in self._segments)
+
+    def close(self):
+        with self._lock:
+            for segment in self._segments:
+                segment.close()
+            self._segments = []
+            self._segment_numbers = []
+            if self._lock_file is not None:
+                self._lock_file.close()  # releases the directory lock
+                self._lock_file = None
+
+
+def encode_step(block_index: int, sub_param_index: int) -> int:
+    """Pack a (block, sub-parameter) pair of indices into one byte"""
+    if 0 <= block_index < 63 and 0 <= sub_param_index < 4:
+        return block_index * 4 + sub_param_index
+    return UNKNOWN_STEP
+
+
+def decode_step(code: int) -> Tuple[int, int]:
+    """Inverse of encode_step, (-1, -1) for unknown steps"""
+    if code == UNKNOWN_STEP:
+        return -1, -1
+    return code // 4, code % 4
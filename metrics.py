@@ -0,0 +1,237 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+
+from dotenv import load_dotenv
+load_dotenv()
+
+
+class LatencyHistogram:
+    """HDR-style log-linear latency histogram (values recorded in microseconds)"""
+
+    def __init__(self, sub_bucket_bits: int = 7):
+        # 7 bits -> exact values below 128, then 64 linear sub-buckets per power of two
+        # (the top bit is implied), so bucket width is at most 1/64 (~1.6%) of the value
+        self._sub_bucket_bits = sub_bucket_bits
+        self._sub_bucket_count = 1 << sub_bucket_bits
+        self._counts: Dict[int, int] = {}  # sparse bucket index -> count
+        self._lock = threading.Lock()
+        self.count = 0
+        self.errors = 0
+        self.total_us = 0
+        self.min_us = 0
+        self.max_us = 0
+
+    def _bucket_index(self, value: int) -> int:
+        if value < self._sub_bucket_count:
+            return value
+        shift = value.bit_length() - self._sub_bucket_bits
+        return (shift << (self._sub_bucket_bits - 1)) + (value >> shift)
+
+    def _bucket_upper(self, index: int) -> int:
+        if index < self._sub_bucket_count:
+            return index
+        shift = (index >> (self._sub_bucket_bits - 1)) - 1
+        mantissa = index - (shift << (self._sub_bucket_bits - 1))
+        return (mantissa << shift) + (1 << shift) - 1
+
+    def record(self, value_us: int, error: bool = False):
+        value_us = max(0, int(value_us))
+        index = self._bucket_index(value_us)
+        with self._lock:
+            self._counts[index] = self._counts.get(index, 0) + 1
+            if self.count == 0 or value_us < self.min_us:
+                self.min_us = value_us
+            if value_us > self.max_us:
+                self.max_us = value_us
+            self.count += 1
+            self.total_us += value_us
+            if error:
+                self.errors += 1
+
+    def percentiles(self, quantiles: List[float]) -> Dict[float, int]:
+        """Return the (bucket upper bound) value in microseconds for each quantile"""
+        with self._lock:
+            items = sorted(self._counts.items())
+            count = self.count
+            max_us = self.max_us
+        result = {q: 0 for q in quantiles}
+        if count == 0:
+            return result
+        for q in quantiles:
+            target = max(1, int(q * count + 0.5))
+            seen = 0
+            for index, bucket_count in items:
+                seen += bucket_count
+                if seen >= target:
+                    result[q] = min(self._bucket_upper(index), max_us)
+                    break
+        return result
+
+    def snapshot(self) -> Dict[str, float]:
+        p = self.percentiles([0.5, 0.9, 0.99, 0.999])
+        with self._lock:
+            count, errors, total_us = self.count, self.errors, self.total_us
+            min_us, max_us = self.min_us, self.max_us
+        return {
+            "count": count,
+            "errors": errors,
+            "total_ms": total_us / 1000,
+            "mean_ms": (total_us / count / 1000) if count else 0.0,
+            "min_ms": min_us / 1000,
+            "p50_ms": p[0.5] / 1000,
+            "p90_ms": p[0.9] / 1000,
+            "p99_ms": p[0.99] / 1000,
+            "p999_ms": p[0.999] / 1000,
+            "max_ms": max_us / 1000,
+        }
+
+
+class _NullSpan:
+    """Shared no-op context manager used when metrics are disabled"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class MetricsRegistry:
+    """In-memory registry of named latency histograms"""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str) -> LatencyHistogram:
+        hist = self._histograms.get(name)
+        if hist is None:
+            with self._lock:
+                hist = self._histograms.setdefault(name, LatencyHistogram())
+        return hist
+
+    def record(self, name: str, seconds: float, error: bool = False):
+        self.histogram(name).record(seconds * 1_000_000, error=error)
+
+    @contextmanager
+    def _timed_span(self, name: str):
+        start = time.perf_counter()
+        error = False
+        try:
+            yield
+        except BaseException:
+            error = True
+            raise
+        finally:
+            self.record(name, time.perf_counter() - start, error=error)
+
+    def span(self, name: str):
+        """Time a block of code: `with metrics.span("rag.embed"): ...`"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return self._timed_span(name)
+
+    def timed(self, name: Optional[str] = None) -> Callable:
+        """Decorator recording call count and latency for a function (e.g. an MCP tool)"""
+        def decorator(fn: Callable) -> Callable:
+            metric_name = name or f"tool.{fn.__name__}"
+
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                start = time.perf_counter()
+                error = False
+                try:
+                    return fn(*args, **kwargs)
+                except BaseException:
+                    error = True
+                    raise
+                finally:
+                    self.record(metric_name, time.perf_counter() - start, error=error)
+            return wrapper
+        return decorator
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+        return {name: hist.snapshot() for name, hist in histograms}
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+    def format_report(self) -> str:
+        """Human-readable table for the get_server_metrics MCP tool"""
+        if not self.enabled:
+            return "Metrics are disabled (set METRICS_ENABLED=true to enable)."
+        snapshot = self.snapshot()
+        if not snapshot:
+            return "No metrics recorded yet."
+        lines = ["Server Metrics (latencies in ms):\n"]
+        for name, s in snapshot.items():
+            lines.append(
+                f"{name}: count={s['count']} errors={s['errors']} mean={s['mean_ms']:.3f} "
+                f"p50={s['p50_ms']:.3f} p90={s['p90_ms']:.3f} p99={s['p99_ms']:.3f} max={s['max_ms']:.3f}"
+            )
+        return "\n".join(lines)
+
+    def render_prometheus(self) -> str:
+        """Render all histograms in the Prometheus text exposition format"""
+        lines = [
+            "# HELP mcp_latency_seconds Latency of MCP tool calls and internal spans.",
+            "# TYPE mcp_latency_seconds summary",
+        ]
+        error_lines = [
+            "# HELP mcp_errors_total Calls that raised an exception.",
+            "# TYPE mcp_errors_total counter",
+        ]
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+        for name, hist in histograms:
+            label = name.replace("\\", "\\\\").replace('"', '\\"')
+            quantiles = hist.percentiles([0.5, 0.9, 0.99, 0.999])
+            for q, value_us in quantiles.items():
+                lines.append(f'mcp_latency_seconds{{name="{label}",quantile="{q}"}} {value_us / 1_000_000:.6f}')
+            lines.append(f'mcp_latency_seconds_sum{{name="{label}"}} {hist.total_us / 1_000_000:.6f}')
+            lines.append(f'mcp_latency_seconds_count{{name="{label}"}} {hist.count}')
+            error_lines.append(f'mcp_errors_total{{name="{label}"}} {hist.errors}')
+        return "\n".join(lines + error_lines) + "\n"
+
+
+def start_metrics_http_server(registry: "MetricsRegistry", host: str = "127.0.0.1", port: int = 9100) -> ThreadingHTTPServer:
+    """Serve registry.render_prometheus() on GET /metrics from a daemon thread"""
+
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # Keep stdout clean, stdio transport uses it
+            pass
+
+    server = ThreadingHTTPServer((host, port), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+# Global registry shared by the server modules in this process
+metrics = MetricsRegistry(enabled=os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes"))
@@ -1,17 +1,23 @@
+import os
 import threading
 import time
-from typing import List, Tuple
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
 from mcp.server.fastmcp import FastMCP
 import argparse
 
 from orchestrator_gui import OrchestratorApp
+from metrics import metrics, start_metrics_http_server
+from responses import TEXT, COMPACT, catalog_renderer, char_budget, compact_json, invalid_format_message
+from execution_log import ExecutionJournal
 app_instance = None
+_blocks_sub_params_cache: Dict[str, str] = {}  # response_format -> rendered block catalog
 mcp = FastMCP("PCB process Orchestrator", host="127.0.0.1", port=8000)
 
-def start_gui_thread():
+def start_gui_thread(headless: bool = False, journal: Optional[ExecutionJournal] = None, line_id: int = 0):
     """Start the GUI in a separate thread"""
     global app_instance
-    app_instance = OrchestratorApp()
+    app_instance = OrchestratorApp(headless=headless, journal=journal, line_id=line_id)
     app_instance.run()
 
 def ensure_app() -> OrchestratorApp:
@@ -37,7 +43,8 @@ def ensure_app() -> OrchestratorApp:
 #     return app.set_block_at_position(pos, block_type)
 
 @mcp.tool()
-def set_sub_param_at_position(pos: int, sub_param: str) -> str:
+@metrics.timed()
+def set_sub_param_at_position(pos: int, sub_param: str, response_format: str = TEXT) -> str:
     """
     Set a sub-parameter at a given position.
     
@@ -49,45 +56,62 @@ def set_sub_param_at_position(pos: int, sub_param: str) -> str:
                   - Soldering: '235C', '245C', '260C'
                   - Optical Inspection: '2D', '3D', 'Automated'
                   - Testing: 'in-circuit', 'functional', 'boundary-scan'
+        response_format: 'text' (default) or 'compact' JSON
     
     Returns:
         Status message with current sequence
     """
+    error = invalid_format_message(response_format)
+    if error:
+        return error
     app = ensure_app()
-    return app.set_sub_param_at_position(pos, sub_param)
+    return app.set_sub_param_at_position(pos, sub_param, response_format=response_format)
 
 @mcp.tool()
-def set_whole_process(sub_params_sequence: List[str]) -> str:
+@metrics.timed()
+def set_whole_process(sub_params_sequence: List[str], response_format: str = TEXT) -> str:
     """
     Set the entire process sequence with sub-parameters.
     
     Args:
         sub_params_sequence: List of 5 sub-parameters for each block in order.
+        response_format: 'text' (default) or 'compact' JSON
     
     Returns:
         Status message with current sequence
     """
+    error = invalid_format_message(response_format)
+    if error:
+        return error
     app = ensure_app()
     try:
         for idx, sub_param in enumerate(sub_params_sequence):
-            app.set_sub_param_at_position(idx, sub_param)
-        return app.get_current_process()
+            app.set_sub_param_at_position(idx, sub_param, response_format=response_format)
+        return app.get_current_process(response_format=response_format)
     except Exception as e:
         return f"Error setting process: {str(e)}"
         
 
 @mcp.tool()
-def get_current_process() -> str:
+@metrics.timed()
+def get_current_process(response_format: str = TEXT) -> str:
     """
     Get the current state of the orchestrator process.
     
+    Args:
+        response_format: 'text' (default) or 'compact' JSON
+    
     Returns:
         Current process with all blocks and parameters, plus validation status
     """
+    error = invalid_format_message(response_format)
+    if error:
+        return error
     app = ensure_app()
-    return app.get_current_process()
+    return app.get_current_process(response_format=response_format)
 
 @mcp.tool()
+@metrics.timed()
 def execute_process() -> str:
     """
     Execute the current process if it's valid.
@@ -99,6 +123,7 @@ def execute_process() -> str:
     return app.post_execute_process()
 
 @mcp.tool()
+@metrics.timed()
 def get_current_process_validity() -> str:
     """
     Check if the current process is valid.
@@ -110,44 +135,65 @@ def get_current_process_validity() -> str:
     return app.get_current_process_validity()
 
 @mcp.tool()
-def get_valid_processes() -> str:
+@metrics.timed()
+def get_valid_processes(response_format: str = TEXT, offset: int = 0, limit: int = 0,
+                        max_chars: int = 0, max_tokens: int = 0) -> str:
     """
     Get all valid process processs that the orchestrator accepts.
     
+    Args:
+        response_format: 'text' (default) or 'compact' JSON
+        offset: Index of the first process to return (for pagination)
+        limit: Maximum number of processes to return (0 = all)
+        max_chars: Character budget for the response (0 = unlimited)
+        max_tokens: Approximate token budget for the response (0 = unlimited)
+    
     Returns:
-        Formatted string listing all 9 valid processs with their steps
+        Formatted string listing the valid processs with their steps
     """
+    error = invalid_format_message(response_format)
+    if error:
+        return error
     app = ensure_app()
-    processes = app.get_valid_processes()
-    
-    result_lines = ["Valid Processes:\n"]
-    
-    for process_idx, process in enumerate(processes, 1):
-        result_lines.append(f"\nProcess {process_idx}:")
-        for step_idx, (block, param) in enumerate(process, 1):
-            result_lines.append(f"  Step {step_idx}: {block} ({param})")
-    
-    return "\n".join(result_lines)
+    renderer = catalog_renderer(app.get_valid_processes())
+    return renderer.render(response_format, offset=offset, limit=limit,
+                           max_chars=char_budget(max_chars, max_tokens))
 
 @mcp.tool()
-def get_possible_blocks_sub_params() -> str:
+@metrics.timed()
+def get_possible_blocks_sub_params(response_format: str = TEXT) -> str:
     """
     Get all possible block types and their valid sub-parameters.
     
+    Args:
+        response_format: 'text' (default) or 'compact' JSON
+    
     Returns:
         Formatted string listing all block types and their sub-parameters
     """
+    error = invalid_format_message(response_format)
+    if error:
+        return error
+    # The block catalog is static, render it once per format
+    if response_format in _blocks_sub_params_cache:
+        return _blocks_sub_params_cache[response_format]
+    
     app = ensure_app()
     blocks_sub_params = app.get_possible_blocks_sub_params()
     
-    result_lines = ["Possible Blocks and Sub-Parameters:\n"]
-    
-    for block, params in blocks_sub_params.items():
-        result_lines.append(f"{block}: {params}")
+    if response_format == COMPACT:
+        result = compact_json(blocks_sub_params)
+    else:
+        result_lines = ["Possible Blocks and Sub-Parameters:\n"]
+        for block, params in blocks_sub_params.items():
+            result_lines.append(f"{block}: {params}")
+        result = "\n".join(result_lines)
     
-    return "\n".join(result_lines)
+    _blocks_sub_params_cache[response_format] = result
+    return result
 
 @mcp.tool()
+@metrics.timed()
 def get_block_sub_params(block_type: str) -> str:
     """
     Get valid sub-parameters for a specific block type.
@@ -167,6 +213,94 @@ def get_block_sub_params(block_type: str) -> str:
     params = app.block_sub_params[block_type]
     return f"Valid sub-parameters for '{block_type}': {params}"
 
+@mcp.tool()
+@metrics.timed()
+def get_recent_executions(limit: int = 20, process_id: Optional[int] = None, since_minutes: float = 0,
+                          response_format: str = TEXT) -> str:
+    """
+    Get the most recent executions from the persistent execution log, newest first.
+    
+    Args:
+        limit: Maximum number of executions to return (default 20)
+        process_id: Only return executions of this process (1-9), or 0 for invalid attempts
+        since_minutes: Only return executions from the last N minutes (0 = no limit)
+        response_format: 'text' (default) or 'compact' JSON
+    
+    Returns:
+        One line per execution with time, line, process, result and sequence
+    """
+    error = invalid_format_message(response_format)
+    if error:
+        return error
+    app = ensure_app()
+    if app.journal is None:
+        return "Execution log is disabled."
+    
+    start = time.time() - since_minutes * 60 if since_minutes > 0 else None
+    records = app.journal.query(start=start, process_id=process_id, limit=max(1, limit))
+    
+    if response_format == COMPACT:
+        return compact_json([
+            {"t": round(record.timestamp, 3), "line": record.line_id, "process": record.process_id,
+             "ok": record.success, "sub_params": [param for _, param in app.decode_sequence(record.steps)]}
+            for record in records
+        ])
+    
+    if not records:
+        return "No executions found."
+    result_lines = [f"Recent Executions ({len(records)}):\n"]
+    for record in records:
+        when = datetime.fromtimestamp(record.timestamp).strftime("%Y-%m-%d %H:%M:%S")
+        process = f"Process {record.process_id}" if record.process_id else "Invalid sequence"
+        status = "executed" if record.success else "rejected"
+        params = ", ".join(param for _, param in app.decode_sequence(record.steps))
+        result_lines.append(f"{when} | line {record.line_id} | {process} | {status} | {params}")
+    return "\n".join(result_lines)
+
+@mcp.tool()
+@metrics.timed()
+def get_execution_counts(since_minutes: float = 0, response_format: str = TEXT) -> str:
+    """
+    Get the number of executions per process from the persistent execution log.
+    
+    Args:
+        since_minutes: Only count executions from the last N minutes (0 = whole log)
+        response_format: 'text' (default) or 'compact' JSON
+    
+    Returns:
+        Execution count per process id (0 = rejected invalid sequences)
+    """
+    error = invalid_format_message(response_format)
+    if error:
+        return error
+    app = ensure_app()
+    if app.journal is None:
+        return "Execution log is disabled."
+    
+    start = time.time() - since_minutes * 60 if since_minutes > 0 else None
+    counts = app.journal.counts(start=start)
+    
+    if response_format == COMPACT:
+        return compact_json({str(process_id): count for process_id, count in counts.items()})
+    
+    window = f"last {since_minutes:g} minutes" if since_minutes > 0 else "all time"
+    result_lines = [f"Execution Counts ({window}):\n"]
+    for process_id, count in counts.items():
+        process = f"Process {process_id}" if process_id else "Invalid sequence"
+        result_lines.append(f"{process}: {count}")
+    result_lines.append(f"Total: {sum(counts.values())}")
+    return "\n".join(result_lines)
+
+@mcp.tool()
+def get_server_metrics() -> str:
+    """
+    Get per-tool call counts and latency percentiles for this server.
+    
+    Returns:
+        Formatted table of call counts, errors and latencies (ms) per tool and span
+    """
+    return metrics.format_report()
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="PCB Assembly Orchestrator FastMCP Server")
     parser.add_argument("--transport", type=str, default="stdio", choices=["stdio", "http"], 
@@ -175,11 +309,31 @@ if __name__ == "__main__":
                        help="HTTP host (default: 127.0.0.1)")
     parser.add_argument("--port", type=int, default=8000, 
                        help="HTTP port (default: 8000)")
+    parser.add_argument("--metrics-port", type=int, default=None,
+                       help="Serve Prometheus metrics on this port (default: disabled)")
+    parser.add_argument("--headless", action="store_true",
+                       help="Run without the GUI window")
+    parser.add_argument("--journal-dir", type=str, default=os.getenv("EXECUTION_LOG_DIR") or "database/execution_log",
+                       help="Directory of the execution log, one per running server (default: database/execution_log)")
+    parser.add_argument("--no-journal", action="store_true",
+                       help="Do not record executions")
+    parser.add_argument("--line-id", type=int, default=int(os.getenv("LINE_ID") or 0),
+                       help="Production line id recorded with each execution (default: 0)")
     args = parser.parse_args()
     
     print(f"Transport: {args.transport}")
     
-    gui_thread = threading.Thread(target=start_gui_thread, daemon=True)
+    if args.metrics_port is not None:
+        start_metrics_http_server(metrics, host=args.host, port=args.metrics_port)
+    
+    journal = None
+    if not args.no_journal:
+        try:
+            journal = ExecutionJournal(args.journal_dir)
+        except (RuntimeError, ValueError) as e:
+            parser.error(f"--journal-dir: {e}")
+    
+    gui_thread = threading.Thread(target=start_gui_thread, args=(args.headless, journal, args.line_id), daemon=True)
     gui_thread.start()
     time.sleep(1)
         
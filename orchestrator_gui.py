@@ -1,15 +1,40 @@
 import customtkinter as ctk
 from processes import VALID_PROCESSES
-from typing import List, Tuple
+from metrics import metrics
+from responses import TEXT, COMPACT, compact_json
+from execution_log import ExecutionJournal, encode_step, decode_step
+from typing import List, Tuple, Optional
+
+class HeadlessWidget:
+    """Stand-in for a CTk widget when running without a display (benchmarks, headless hosts)"""
+    def __init__(self, **kwargs):
+        self._config = dict(kwargs)
+    
+    def configure(self, **kwargs):
+        self._config.update(kwargs)
+    
+    def cget(self, key):
+        return self._config.get(key)
+    
+    def set(self, value):
+        self._config["value"] = value
+    
+    def get(self):
+        return self._config.get("value")
 
 class OrchestratorApp:
-    def __init__(self):
-        ctk.set_appearance_mode("light")
-        ctk.set_default_color_theme("blue")
-        
-        self.root = ctk.CTk()
-        self.root.title("PCB Assembly Orchestrator")
-        self.root.geometry("900x1200")
+    def __init__(self, headless: bool = False, journal: Optional[ExecutionJournal] = None, line_id: int = 0):
+        self.headless = headless
+        self.journal = journal  # optional persistent log of executions
+        self.line_id = line_id
+        self.root = None
+        if not headless:
+            ctk.set_appearance_mode("light")
+            ctk.set_default_color_theme("blue")
+            
+            self.root = ctk.CTk()
+            self.root.title("PCB Assembly Orchestrator")
+            self.root.geometry("900x1200")
         
         self.blocks = ['Solder Paste Application', 'Component Placement', 'Soldering', 'Optical Inspection', 'Testing'] # correspond sequentially to color_map
         self.sub_params = ['lead-free', 'high-speed', '235C', '2D', 'in-circuit']  # Sub-parameters for each block
@@ -40,8 +65,31 @@ class OrchestratorApp:
         self.execute_button = None
         self.execution_status_label = None
         
-        self._setup_gui()
+        # Render model: last options applied to each widget (by id) and the pending repaint flag
+        self.execution_status = ("", "gray")
+        self._rendered = {}
+        self._repaint_pending = False
+        
+        # Lookup of sequence -> process index, rebuilt when valid_processes is replaced
+        self._process_index = {}
+        self._process_index_source = None
+        self._process_index_size = 0
+        
+        if headless:
+            self._setup_headless()
+        else:
+            self._setup_gui()
         self.update_display()
+    
+    def _setup_headless(self):
+        """Create widget stand-ins so the MCP methods work without Tk"""
+        self.block_labels = [HeadlessWidget() for _ in range(5)]
+        self.sub_param_labels = [HeadlessWidget() for _ in range(5)]
+        self.dropdowns = [HeadlessWidget() for _ in range(5)]
+        self.sub_param_dropdowns = [HeadlessWidget() for _ in range(5)]
+        self.status_label = HeadlessWidget()
+        self.execute_button = HeadlessWidget(state="disabled")
+        self.execution_status_label = HeadlessWidget()
         
     def _setup_gui(self):
         # Main container
@@ -186,93 +234,157 @@ class OrchestratorApp:
         self.sequences_textbox.configure(state="disabled")
         
     def update_display(self):
-        """Update the visual display of blocks"""
-        for i, label in enumerate(self.block_labels):
-            block_type = self.blocks[i]
-            block_color = self.color_map[block_type]
-            # Split block name into multiple lines for display
-            block_text = block_type.replace(' ', '\n')
-            label.configure(text=block_text, fg_color=block_color)
-        
-        # Update sub-parameter labels
-        for i, sub_label in enumerate(self.sub_param_labels):
-            sub_label.configure(text=self.sub_params[i])
-        
-        # Update dropdowns to match current blocks
-        for i, dropdown in enumerate(self.dropdowns):
-            dropdown.set(self.blocks[i])
-        
-        # Update sub-parameter dropdowns with valid options for each block
-        for i, sub_dropdown in enumerate(self.sub_param_dropdowns):
-            block_type = self.blocks[i]
-            valid_sub_params = self.block_sub_params[block_type]
-            sub_dropdown.configure(values=valid_sub_params)
-            
+        """Normalize the current sequence and schedule a repaint of the blocks"""
+        with metrics.span("gui.update_display"):
             # Reset to first valid sub-param if current is invalid for this block
-            if self.sub_params[i] not in valid_sub_params:
-                self.sub_params[i] = valid_sub_params[0]
+            for i, block_type in enumerate(self.blocks):
+                valid_sub_params = self.block_sub_params[block_type]
+                if self.sub_params[i] not in valid_sub_params:
+                    self.sub_params[i] = valid_sub_params[0]
             
-            sub_dropdown.set(self.sub_params[i])
+            # Clear execution status when sequence changes
+            self.execution_status = ("", "gray")
+            self._schedule_repaint()
+    
+    def _schedule_repaint(self):
+        """Coalesce bursts of updates into a single repaint on the next idle cycle"""
+        if self.headless:
+            self._repaint()
+            return
+        if self._repaint_pending:
+            return
+        self._repaint_pending = True
+        self.root.after_idle(self._repaint)
+    
+    def _repaint(self):
+        """Apply the current state to the widgets, touching only those whose values changed"""
+        self._repaint_pending = False
+        with metrics.span("gui.repaint"):
+            for i, block_type in enumerate(self.blocks):
+                # Split block name into multiple lines for display
+                self._apply(self.block_labels[i], text=block_type.replace(' ', '\n'),
+                            fg_color=self.color_map[block_type])
+                self._apply(self.sub_param_labels[i], text=self.sub_params[i])
+                self._apply(self.dropdowns[i], value=block_type)
+                self._apply(self.sub_param_dropdowns[i], values=self.block_sub_params[block_type],
+                            value=self.sub_params[i])
+            
+            text, text_color = self.execution_status
+            self._apply(self.execution_status_label, text=text, text_color=text_color)
+            
+            process_idx = self.match_process()
+            if process_idx is not None:
+                self._apply(self.status_label,
+                            text=f"✓ Valid Combination! (Process {process_idx})",
+                            text_color="#05b044")
+                self._apply(self.execute_button, state="normal")
+            else:
+                self._apply(self.status_label, text="Status: Invalid sequence", text_color="gray")
+                self._apply(self.execute_button, state="disabled")
+    
+    def _apply(self, widget, **options) -> bool:
+        """
+        Configure widget with only the options that differ from what was last applied.
+        The 'value' option is compared with widget.get() instead of the cache, so text
+        typed into an editable combobox is still reset, and applied with widget.set().
+        Only call from _repaint so widgets are touched on the thread that owns them.
+        """
+        value = options.pop("value", None)
+        rendered = self._rendered.get(id(widget))
+        if rendered is None:
+            rendered = self._rendered[id(widget)] = {}
         
-        # Clear execution status when sequence changes
-        self.execution_status_label.configure(text="", text_color="gray")
+        changed = {}
+        if rendered != options:
+            changed = {key: option for key, option in options.items() if rendered.get(key) != option}
+            rendered.update(changed)
+            widget.configure(**changed)
+        if value is not None and widget.get() != value:
+            widget.set(value)
+            return True
+        return bool(changed)
         
-        self.check_process()
+    def match_process(self) -> Optional[int]:
+        """Return the 1-based index of the valid process matching the current sequence, or None"""
+        if self._process_index_source is not self.valid_processes or len(self._process_index_source) != self._process_index_size:
+            self._process_index = {}
+            for process_idx, process in enumerate(self.valid_processes, 1):
+                # First match wins, as with a linear scan
+                self._process_index.setdefault(tuple(process), process_idx)
+            self._process_index_source = self.valid_processes
+            self._process_index_size = len(self.valid_processes)
         
+        return self._process_index.get(tuple(zip(self.blocks, self.sub_params)))
+    
     def check_process(self) -> str:
-        """Check if current sequence matches any of the valid processs"""
-        # Create current sequence as list of tuples
-        current_sequence = [(self.blocks[i], self.sub_params[i]) for i in range(5)]
-        
-        # Check if current sequence matches any valid process
-        for process_idx, process in enumerate(self.valid_processes, 1):
-            if current_sequence == process:
-                self.status_label.configure(
-                    text=f"✓ Valid Combination! (Process {process_idx})",
-                    text_color="#05b044"
-                )
-                self.execute_button.configure(state="normal")
-                return f"Valid Combination (Process {process_idx})"
-        
-        self.status_label.configure(text="Status: Invalid sequence",
-                                   text_color="gray")
-        self.execute_button.configure(state="disabled")
+        """Check if current sequence matches any of the valid processs (widgets are left to _repaint)"""
+        process_idx = self.match_process()
+        if process_idx is not None:
+            return f"Valid Combination (Process {process_idx})"
         return "Invalid sequence"
     
+    def encode_sequence(self) -> List[int]:
+        """Current sequence as one-byte step codes for the execution journal"""
+        block_types = list(self.block_sub_params)
+        return [encode_step(block_types.index(block), self.block_sub_params[block].index(param))
+                for block, param in zip(self.blocks, self.sub_params)]
+    
+    def decode_sequence(self, steps) -> List[Tuple[str, str]]:
+        """Inverse of encode_sequence, unknown steps decode to ('?', '?')"""
+        block_types = list(self.block_sub_params)
+        sequence = []
+        for code in steps:
+            block_idx, param_idx = decode_step(code)
+            if 0 <= block_idx < len(block_types) and 0 <= param_idx < len(self.block_sub_params[block_types[block_idx]]):
+                block = block_types[block_idx]
+                sequence.append((block, self.block_sub_params[block][param_idx]))
+            else:
+                sequence.append(('?', '?'))
+        return sequence
+    
     def execute(self) -> str:
         """Execute the current valid sequence"""
-        current_sequence = [(self.blocks[i], self.sub_params[i]) for i in range(5)]
-        
-        # Check if sequence matches any valid process
-        for process_idx, process in enumerate(self.valid_processes, 1):
-            if current_sequence == process:
-                self.execution_status_label.configure(
-                    text=f"✓ Sequence Executed Successfully! (Process {process_idx})",
-                    text_color="#22c55e"
-                )
-                return f"Executed sequence: {current_sequence} (Process {process_idx})"
+        process_idx = self.match_process()
+        if self.journal is not None:
+            self.journal.append(process_idx or 0, self.encode_sequence(),
+                                line_id=self.line_id, success=process_idx is not None)
+        if process_idx is not None:
+            current_sequence = [(self.blocks[i], self.sub_params[i]) for i in range(5)]
+            self.execution_status = (f"✓ Sequence Executed Successfully! (Process {process_idx})", "#22c55e")
+            self._schedule_repaint()
+            return f"Executed sequence: {current_sequence} (Process {process_idx})"
         
-        self.execution_status_label.configure(
-            text="✗ Cannot execute invalid sequence",
-            text_color="#f30a0a"
-        )
+        self.execution_status = ("✗ Cannot execute invalid sequence", "#f30a0a")
+        self._schedule_repaint()
         return "Cannot execute invalid sequence"
     
     # # # # # # # # # # # # # # # # # # # #
     # Methods for MCP integration # # # # #
     # # # # # # # # # # # # # # # # # # # #
        
-    def set_block_at_position(self, pos: int, block_type: str) -> str:
+    def current_state(self) -> dict:
+        """Compact snapshot of the current sequence for JSON responses"""
+        state = {"sub_params": list(self.sub_params), "valid_process": self.match_process()}
+        # Block order only needs sending when it differs from the standard one
+        if self.blocks != list(self.block_sub_params):
+            state["blocks"] = list(self.blocks)
+        return state
+    
+    def set_block_at_position(self, pos: int, block_type: str, response_format: str = TEXT) -> str:
         """Set a specific block type at a position"""
         if 0 <= pos < 5 and block_type in ['Solder Paste Application', 'Component Placement', 'Soldering', 'Optical Inspection', 'Testing']:
         # if 0 <= pos < 5 and block_type in self.blocks_sub_params.keys():            
             self.blocks[pos] = block_type
             self.sub_params[pos] = self.block_sub_params[block_type][0]
             self.update_display()
+            if response_format == COMPACT:
+                return compact_json({"ok": True, **self.current_state()})
             return f"Set position {pos} to {block_type}. Current: {list(zip(self.blocks, self.sub_params))}"
+        if response_format == COMPACT:
+            return compact_json({"ok": False, "error": "Invalid position or block type"})
         return "Invalid position or block type"
     
-    def set_sub_param_at_position(self, pos: int, sub_param: str) -> str:
+    def set_sub_param_at_position(self, pos: int, sub_param: str, response_format: str = TEXT) -> str:
         """Set a sub-parameter at a position"""
         if 0 <= pos < 5:
             block_type = self.blocks[pos]
@@ -281,16 +393,25 @@ class OrchestratorApp:
             if sub_param in valid_sub_params:
                 self.sub_params[pos] = sub_param
                 self.update_display()
+                if response_format == COMPACT:
+                    return compact_json({"ok": True, **self.current_state()})
                 return f"Set sub-parameter at position {pos} to {sub_param}. Current: {list(zip(self.blocks, self.sub_params))}"
+            if response_format == COMPACT:
+                return compact_json({"ok": False, "error": f"Invalid sub-parameter '{sub_param}' for position {pos}",
+                                     "valid_options": valid_sub_params})
             return f"Invalid sub-parameter '{sub_param}' for block type '{block_type}'. Valid options: {valid_sub_params}"
+        if response_format == COMPACT:
+            return compact_json({"ok": False, "error": "Invalid position"})
         return "Invalid position"
     
     def get_possible_blocks_sub_params(self) -> dict:
         """Return available blocks and their sub-parameters"""
         return self.block_sub_params
     
-    def get_current_process(self) -> str:
+    def get_current_process(self, response_format: str = TEXT) -> str:
         status = self.check_process()
+        if response_format == COMPACT:
+            return compact_json(self.current_state())
         current_sequence = list(zip(self.blocks, self.sub_params))
         return f"Current process: {current_sequence}. Status: {status}"
     
@@ -309,6 +430,8 @@ class OrchestratorApp:
     # End of MCP integration methods #
     
     def run(self):
+        if self.headless:
+            return
         self.root.mainloop()
 
 if __name__ == "__main__":
@@ -1,18 +1,83 @@
 import os
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 
+import numpy as np
 from langchain_community.document_loaders import DirectoryLoader, UnstructuredMarkdownLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_ollama import OllamaEmbeddings
 from langchain_chroma import Chroma
 from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
 from mcp.server.fastmcp import FastMCP
 
+from metrics import metrics, start_metrics_http_server
+from responses import TEXT, COMPACT, char_budget, compact_json, invalid_format_message, truncate
+
 from dotenv import load_dotenv
 load_dotenv()
 
 
+def maximal_marginal_relevance(
+    query_embedding: np.ndarray,
+    candidate_embeddings: np.ndarray,
+    k: int,
+    lambda_mult: float = 0.5,
+    groups: Optional[List[str]] = None,
+    max_per_group: Optional[int] = None
+) -> List[int]:
+    """
+    Select k candidate indices by MMR, optionally allowing at most max_per_group
+    picks per group label (e.g. process_name). Similarities are computed once as
+    matrix products; the greedy loop only does vector updates.
+    """
+    n = len(candidate_embeddings)
+    if n == 0 or k <= 0:
+        return []
+    
+    candidates = np.asarray(candidate_embeddings, dtype=np.float32)
+    query = np.asarray(query_embedding, dtype=np.float32)
+    candidates = candidates / np.maximum(np.linalg.norm(candidates, axis=1, keepdims=True), 1e-12)
+    query = query / max(float(np.linalg.norm(query)), 1e-12)
+    
+    relevance = candidates @ query
+    pairwise = candidates @ candidates.T
+    
+    group_ids = None
+    if groups is not None and max_per_group is not None:
+        _, group_ids = np.unique(np.asarray(groups, dtype=object).astype(str), return_inverse=True)
+        group_counts = np.zeros(group_ids.max() + 1, dtype=np.int64)
+    
+    available = np.ones(n, dtype=bool)
+    max_similarity = np.zeros(n, dtype=np.float32)  # max similarity to anything already selected
+    selected: List[int] = []
+    
+    while len(selected) < k and available.any():
+        scores = lambda_mult * relevance - (1 - lambda_mult) * max_similarity
+        scores[~available] = -np.inf
+        idx = int(np.argmax(scores))
+        selected.append(idx)
+        available[idx] = False
+        if len(selected) == 1:
+            max_similarity = pairwise[idx].copy()
+        else:
+            np.maximum(max_similarity, pairwise[idx], out=max_similarity)
+        if group_ids is not None:
+            group = group_ids[idx]
+            group_counts[group] += 1
+            if group_counts[group] >= max_per_group:
+                available[group_ids == group] = False
+    
+    return selected
+
+
 class ProcessRAG:
     """RAG system for retrieving PCB assembly process information"""
     
@@ -24,17 +89,20 @@ class ProcessRAG:
         ollama_base_url: str = "http://localhost:11434",
         # embedding_model: str = "qwen3-embedding:4b",
         embedding_model: str = "qwen3-embedding:0.6b",
-        persist_directory: str = os.getenv("CHROMA_PERSIST_DIR", "database/chroma_db")
+        persist_directory: str = os.getenv("CHROMA_PERSIST_DIR", "database/chroma_db"),
+        collection_name: str = "pcb_processes",
+        embeddings: Optional[Embeddings] = None  # share one embedder across collections
     ):
         self.documents_dir = Path(documents_dir)
         self.ollama_base_url = ollama_base_url
         self.embedding_model = embedding_model
         self.persist_directory = persist_directory # for chroma db
+        self.collection_name = collection_name
         
         if not os.path.exists(self.documents_dir):
             raise FileNotFoundError(f"Documents directory '{self.documents_dir}' does not exist.")        
         
-        self.embeddings = OllamaEmbeddings(
+        self.embeddings = embeddings or OllamaEmbeddings(
             model=embedding_model,
             base_url=ollama_base_url
         )
@@ -88,7 +156,7 @@ class ProcessRAG:
             documents=documents,
             embedding=self.embeddings,
             persist_directory=self.persist_directory,
-            collection_name="pcb_processes"
+            collection_name=self.collection_name
         )
         
         return vector_store
@@ -100,7 +168,7 @@ class ProcessRAG:
             self.vector_store = Chroma(
                 persist_directory=self.persist_directory,
                 embedding_function=self.embeddings,
-                collection_name="pcb_processes"
+                collection_name=self.collection_name
             )
         else:
             # if persist_directory exists, delete it
@@ -120,33 +188,150 @@ class ProcessRAG:
         )
         
     
-    def retrieve(self, query: str, k: int = 2) -> List[Document]:
-
+    def unload(self):
+        """Release the vector store (and its Chroma client) to free memory"""
+        client = getattr(self.vector_store, "_client", None)
+        close = getattr(client, "close", None)  # Client.close() only exists in newer chromadb
+        if close is not None:
+            close()
+        self.vector_store = None
+        self.retriever = None
+    
+    def _query_candidates(self, query_embedding: List[float], n_results: int) -> Dict[str, Any]:
+        """
+        Nearest chunks together with their stored embeddings, which the public Chroma
+        search methods don't return. NOTE: uses langchain_chroma's private _collection
+        (the raw chromadb collection); keep every such access here so an upgrade that
+        changes it only breaks this method.
+        """
+        return self.vector_store._collection.query(
+            query_embeddings=[query_embedding],
+            n_results=n_results,
+            include=["documents", "metadatas", "embeddings", "distances"]
+        )
+    
+    def retrieve(
+        self,
+        query: str,
+        k: int = 2,
+        diverse: bool = False,
+        fetch_k: int = 20,
+        lambda_mult: float = 0.5,
+        max_per_process: Optional[int] = None
+    ) -> List[Document]:
+        """
+        Plain top-k similarity by default. With diverse=True, fetch fetch_k candidates
+        and re-rank them by MMR; max_per_process caps chunks taken from one process doc.
+        """
+        if self.retriever is None:
+            raise RuntimeError("RAG system not initialized. Call initialize() first.")
+        
+        # Embed and search separately (same as the similarity retriever) so each step is timed
+        with metrics.span("rag.retrieve.embed"):
+            query_embedding = self.embeddings.embed_query(query)
+        
+        results = self.retrieve_by_vector(query_embedding, k=k, diverse=diverse, fetch_k=fetch_k,
+                                          lambda_mult=lambda_mult, max_per_process=max_per_process)
+        return [doc for doc, _ in results]
+    
+    def retrieve_by_vector(
+        self,
+        query_embedding: List[float],
+        k: int = 2,
+        diverse: bool = False,
+        fetch_k: int = 20,
+        lambda_mult: float = 0.5,
+        max_per_process: Optional[int] = None
+    ) -> List[Tuple[Document, float]]:
+        """Same as retrieve() for an already embedded query, returning (document, distance) pairs"""
         if self.retriever is None:
             raise RuntimeError("RAG system not initialized. Call initialize() first.")
         
-        self.retriever.search_kwargs = {"k": k}
-        results = self.retriever.invoke(query)
-        return results
+        if not diverse:
+            with metrics.span("rag.retrieve.vector_search"):
+                results = self.vector_store.similarity_search_by_vector_with_relevance_scores(query_embedding, k=k)
+            return results
+        
+        with metrics.span("rag.retrieve.vector_search"):
+            candidates = self._query_candidates(query_embedding, max(fetch_k, k))
+        
+        with metrics.span("rag.retrieve.mmr"):
+            texts = candidates["documents"][0]
+            metadatas = [metadata or {} for metadata in candidates["metadatas"][0]]
+            distances = candidates["distances"][0]
+            selected = maximal_marginal_relevance(
+                np.asarray(query_embedding, dtype=np.float32),
+                np.asarray(candidates["embeddings"][0], dtype=np.float32),
+                k=k,
+                lambda_mult=lambda_mult,
+                groups=[metadata.get('process_name', '') for metadata in metadatas],
+                max_per_group=max_per_process
+            )
+        return [(Document(page_content=texts[i], metadata=metadatas[i]), float(distances[i])) for i in selected]
+    
+    @staticmethod
+    def format_results(documents: List[Document], response_format: str = TEXT, max_chars: int = 0) -> str:
+        with metrics.span("rag.format_results"):
+            return ProcessRAG._format_results(documents, response_format, max_chars)
     
-    def format_results(self, documents: List[Document]) -> str:
+    @staticmethod
+    def _format_results(documents: List[Document], response_format: str = TEXT, max_chars: int = 0) -> str:
+        if response_format == COMPACT:
+            return ProcessRAG._format_results_compact(documents, max_chars)
+        
         if not documents:
             return "No relevant process documentation found."
         
-        formatted = "\nInformation\n"
+        parts = ["\nInformation\n"]
         
         for i, doc in enumerate(documents, 1):
             process_name = doc.metadata.get('process_name', 'Unknown Process')
-            formatted += f"Process: {process_name}\n"
+            if 'collection' in doc.metadata:
+                process_name = f"{process_name} [{doc.metadata['collection']}]"
+            parts.append(f"Process: {process_name}\n")
             page_content = doc.page_content.replace('\n\n', '\n')
-            formatted += f"{page_content}\n"
+            parts.append(f"{page_content}\n")
+        
+        return truncate("".join(parts), max_chars)
+    
+    @staticmethod
+    def _format_results_compact(documents: List[Document], max_chars: int = 0) -> str:
+        """JSON list of {process, text}; the budget trims chunk text, never the JSON structure"""
+        results = []
+        for doc in documents:
+            result = {"process": doc.metadata.get('process_name', 'Unknown Process')}
+            if 'collection' in doc.metadata:
+                result["collection"] = doc.metadata['collection']
+            result["text"] = doc.page_content.replace('\n\n', '\n')
+            results.append(result)
+        formatted = compact_json({"results": results})
+        if max_chars <= 0 or len(formatted) <= max_chars:
+            return formatted
         
-        return formatted
+        # Trim text from the lowest-ranked chunks first. Sizes are measured on the serialized
+        # payload since escaped newlines and quotes take more room than the raw text.
+        payload = {"results": results, "truncated": True}
+        while results:
+            result = results[-1]
+            text = result["text"]
+            low, high = 0, len(text)
+            while low < high:
+                mid = (low + high + 1) // 2
+                result["text"] = text[:mid]
+                if len(compact_json(payload)) <= max_chars:
+                    low = mid
+                else:
+                    high = mid - 1
+            if low > 0:
+                result["text"] = text[:low]
+                break
+            results.pop()
+        return compact_json(payload)
     
-    def search(self, query: str, k: int = 2) -> str:
+    def search(self, query: str, k: int = 2, response_format: str = TEXT, max_chars: int = 0, **retrieve_kwargs) -> str:
 
-        documents = self.retrieve(query, k=k)
-        return self.format_results(documents)
+        documents = self.retrieve(query, k=k, **retrieve_kwargs)
+        return self.format_results(documents, response_format=response_format, max_chars=max_chars)
     
     def search_company(self, company_name: str, k: int = 3) -> str:
 
@@ -161,40 +346,294 @@ class ProcessRAG:
         return self.format_results(documents)
 
 
-# Global RAG instance # TODO, non global option?
-_rag_instance: ProcessRAG | None = None
+DEFAULT_COLLECTION = "pcb_processes"
+# Chroma collection names: 3-512 chars of [a-zA-Z0-9._-], starting and ending with a letter or digit
+COLLECTION_NAME_PATTERN = re.compile(r"[a-zA-Z0-9][a-zA-Z0-9._-]{1,510}[a-zA-Z0-9]")
+
+
+class RAGRegistry:
+    """
+    Named ProcessRAG collections (one documents dir + Chroma store each), loaded on
+    first use. At most max_loaded stay in memory: the least recently used one is
+    unloaded when a new one is loaded, and collections idle for longer than
+    idle_seconds (0 = never) are unloaded on the next access.
+    """
+    
+    def __init__(
+        self,
+        ollama_base_url: str = "http://localhost:11434",
+        embedding_model: str = "qwen3-embedding:0.6b",
+        max_loaded: int = 4,
+        idle_seconds: float = 0,
+        embeddings: Optional[Embeddings] = None
+    ):
+        self.ollama_base_url = ollama_base_url
+        self.embedding_model = embedding_model
+        self.max_loaded = max(1, max_loaded)
+        self.idle_seconds = idle_seconds
+        # All collections share one embedder so a fanned-out query is embedded once
+        self.embeddings = embeddings or OllamaEmbeddings(model=embedding_model, base_url=ollama_base_url)
+        
+        self._configs: Dict[str, Tuple[Path, str]] = {}  # name -> (documents_dir, persist_directory)
+        self._loaded: "OrderedDict[str, ProcessRAG]" = OrderedDict()  # LRU order, oldest first
+        self._last_used: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._pins: Dict[int, int] = {}  # id(ProcessRAG) -> in-flight searches, unload waits for 0
+        self._executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="rag-shard")
+    
+    def register(self, name: str, documents_dir: str, persist_directory: Optional[str] = None):
+        """Add a collection; by default it is persisted under CHROMA_COLLECTIONS_DIR/<name>"""
+        if not COLLECTION_NAME_PATTERN.fullmatch(name):
+            raise ValueError(f"Invalid collection name '{name}': use 3-512 letters, digits, '.', '_' or '-', "
+                             "starting and ending with a letter or digit")
+        if persist_directory is None:
+            collections_dir = os.getenv("CHROMA_COLLECTIONS_DIR") or "database/collections"
+            persist_directory = os.path.join(collections_dir, name)
+        with self._lock:
+            self._configs[name] = (Path(documents_dir).resolve(), persist_directory)
+            self._load_locks.setdefault(name, threading.Lock())
+    
+    def names(self) -> List[str]:
+        return list(self._configs)
+    
+    def documents_dir(self, name: str) -> Path:
+        return self._configs[name][0]
+    
+    def loaded_names(self) -> List[str]:
+        with self._lock:
+            return list(self._loaded)
+    
+    def get(self, name: str, force_reload: bool = False) -> ProcessRAG:
+        """Return the loaded collection, loading it (and evicting others) if needed"""
+        return self._get(name, force_reload=force_reload, pin=False)
+    
+    @contextmanager
+    def acquire(self, name: str):
+        """Like get(), but an eviction while the block runs defers unloading the collection"""
+        rag = self._get(name, pin=True)
+        try:
+            yield rag
+        finally:
+            with self._lock:
+                self._pins[id(rag)] -= 1
+                release = self._pins[id(rag)] == 0 and self._loaded.get(name) is not rag
+                if self._pins[id(rag)] == 0:
+                    del self._pins[id(rag)]
+            if release:
+                rag.unload()
+    
+    def _get(self, name: str, force_reload: bool = False, pin: bool = False) -> ProcessRAG:
+        if name not in self._configs:
+            raise KeyError(f"Unknown collection '{name}'. Available: {self.names()}")
+        self._evict_idle()
+        
+        with self._lock:
+            rag = self._loaded.get(name)
+            if rag is not None and not force_reload:
+                self._loaded.move_to_end(name)
+                self._last_used[name] = time.monotonic()
+                if pin:
+                    self._pins[id(rag)] = self._pins.get(id(rag), 0) + 1
+                return rag
+        
+        # Load outside the registry lock so other collections stay queryable meanwhile
+        evicted = []
+        with self._load_locks[name]:
+            with self._lock:
+                rag = self._loaded.get(name)
+            if rag is None or force_reload:
+                documents_dir, persist_directory = self._configs[name]
+                with metrics.span("rag.collection_load"):
+                    new_rag = ProcessRAG(
+                        documents_dir=documents_dir,
+                        ollama_base_url=self.ollama_base_url,
+                        embedding_model=self.embedding_model,
+                        persist_directory=persist_directory,
+                        collection_name=name,
+                        embeddings=self.embeddings
+                    )
+                    new_rag.initialize(force_reload=force_reload)
+                if rag is not None:
+                    evicted.append(rag)
+                rag = new_rag
+            
+            with self._lock:
+                self._loaded[name] = rag
+                self._loaded.move_to_end(name)
+                self._last_used[name] = time.monotonic()
+                if pin:
+                    self._pins[id(rag)] = self._pins.get(id(rag), 0) + 1
+                while len(self._loaded) > self.max_loaded:
+                    evicted.append(self._loaded.popitem(last=False)[1])
+        self._unload(evicted)
+        return rag
+    
+    def _evict_idle(self):
+        if self.idle_seconds <= 0:
+            return
+        cutoff = time.monotonic() - self.idle_seconds
+        evicted = []
+        with self._lock:
+            for name in [name for name in self._loaded if self._last_used.get(name, 0) < cutoff]:
+                evicted.append(self._loaded.pop(name))
+        self._unload(evicted)
+    
+    def _unload(self, evicted: List[ProcessRAG]):
+        """Unload evicted collections now, or when their last in-flight search releases them"""
+        with self._lock:
+            idle = [rag for rag in evicted if id(rag) not in self._pins]
+        for rag in idle:
+            rag.unload()
+    
+    def search(
+        self,
+        query: str,
+        collections: Optional[List[str]] = None,
+        k: int = 2,
+        response_format: str = TEXT,
+        max_chars: int = 0,
+        **retrieve_kwargs
+    ) -> str:
+        """
+        Search one or more collections. The query is embedded once, the collections
+        are searched in parallel, and the top k chunks overall are kept by distance.
+        """
+        # Deduplicate in order so the same collection is never searched (and merged) twice
+        names = list(dict.fromkeys(collections or [DEFAULT_COLLECTION]))
+        if "*" in names:
+            names = self.names()
+        unknown = [name for name in names if name not in self._configs]
+        if unknown:
+            return f"Unknown collection(s) {unknown}. Available: {self.names()}"
+        
+        if len(names) == 1:
+            with self.acquire(names[0]) as rag:
+                return rag.search(query, k=k, response_format=response_format,
+                                  max_chars=max_chars, **retrieve_kwargs)
+        
+        with metrics.span("rag.retrieve.embed"):
+            query_embedding = self.embeddings.embed_query(query)
+        
+        def search_shard(name: str) -> List[Tuple[Document, float]]:
+            with metrics.span("rag.shard_search"), self.acquire(name) as rag:
+                results = rag.retrieve_by_vector(query_embedding, k=k, **retrieve_kwargs)
+            for doc, _ in results:
+                doc.metadata['collection'] = name
+            return results
+        
+        merged = []
+        for results in self._executor.map(search_shard, names):
+            merged.extend(results)
+        merged.sort(key=lambda result: result[1])  # lower distance = more similar
+        
+        documents = [doc for doc, _ in merged[:k]]
+        return ProcessRAG.format_results(documents, response_format=response_format, max_chars=max_chars)
+
+
+# Global RAG registry, the default collection is the repo's documents/ folder
+_registry: Optional[RAGRegistry] = None
+
+
+def get_registry(ollama_base_url: str = "http://localhost:11434") -> RAGRegistry:
+    
+    global _registry
+    
+    if _registry is None:
+        _registry = RAGRegistry(
+            ollama_base_url=ollama_base_url,
+            max_loaded=int(os.getenv("RAG_MAX_LOADED_COLLECTIONS") or 4),
+            idle_seconds=float(os.getenv("RAG_COLLECTION_IDLE_MINUTES") or 0) * 60
+        )
+        _registry.register(DEFAULT_COLLECTION, "./documents",
+                           persist_directory=os.getenv("CHROMA_PERSIST_DIR") or "database/chroma_db")
+        # Extra collections as "name=documents_dir;name=documents_dir"
+        for spec in (os.getenv("RAG_COLLECTIONS") or "").split(";"):
+            if not spec.strip():
+                continue
+            name, _, documents_dir = spec.partition("=")
+            try:
+                if not documents_dir.strip():
+                    raise ValueError("expected name=documents_dir")
+                _registry.register(name.strip(), documents_dir.strip())
+            except ValueError as e:
+                # stdout carries the stdio transport, report on stderr and keep serving
+                print(f"Skipping RAG_COLLECTIONS entry '{spec}': {e}", file=sys.stderr)
+    
+    return _registry
 
 
 def get_rag_instance(
     ollama_base_url: str = "http://localhost:11434",
-    force_reload: bool = False
+    force_reload: bool = False,
+    collection: str = DEFAULT_COLLECTION
 ) -> ProcessRAG:
 
-    global _rag_instance
-    
-    if _rag_instance is None:
-        _rag_instance = ProcessRAG(ollama_base_url=ollama_base_url)
-        _rag_instance.initialize(force_reload=force_reload)
-    
-    return _rag_instance
+    return get_registry(ollama_base_url).get(collection, force_reload=force_reload)
 
 
 mcp = FastMCP("PCB Process RAG Server", host="127.0.0.1", port=8001)
 
 
 @mcp.tool()
-def get_query_rag(query: str) -> str:
+@metrics.timed()
+def get_query_rag(query: str, diverse: bool = True, response_format: str = TEXT,
+                  max_chars: int = 0, max_tokens: int = 0, collections: Optional[List[str]] = None) -> str:
     """
     Search the RAG system for general information about PCB assembly processes.
     
     Args:
         query: The search query about PCB processes, materials, or techniques
+        diverse: If True (default), return chunks from different processes instead
+                 of adjacent chunks of the same process document
+        response_format: 'text' (default) or 'compact' JSON
+        max_chars: Character budget for the response (0 = unlimited)
+        max_tokens: Approximate token budget for the response (0 = unlimited)
+        collections: Site collections to search (default: the main collection, ["*"] = all).
+                     See list_rag_collections.
         
     Returns:
         Relevant information from the documentation
     """
-    rag = get_rag_instance()
-    return rag.search(query, k=2)
+    error = invalid_format_message(response_format)
+    if error:
+        return error
+    registry = get_registry()
+    budget = char_budget(max_chars, max_tokens)
+    if diverse:
+        return registry.search(query, collections=collections, k=2, response_format=response_format,
+                               max_chars=budget, diverse=True, max_per_process=1)
+    return registry.search(query, collections=collections, k=2, response_format=response_format, max_chars=budget)
+
+
+@mcp.tool()
+@metrics.timed()
+def list_rag_collections() -> str:
+    """
+    List the document collections (e.g. one per plant/site) available to get_query_rag.
+    
+    Returns:
+        Collection names with their documents directory and whether they are loaded
+    """
+    registry = get_registry()
+    loaded = set(registry.loaded_names())
+    result_lines = ["RAG Collections:\n"]
+    for name in registry.names():
+        state = "loaded" if name in loaded else "not loaded"
+        result_lines.append(f"{name}: {registry.documents_dir(name)} ({state})")
+    return "\n".join(result_lines)
+
+
+@mcp.tool()
+def get_server_metrics() -> str:
+    """
+    Get per-tool call counts and latency percentiles for this server,
+    including embedding, vector search and formatting time of retrievals.
+    
+    Returns:
+        Formatted table of call counts, errors and latencies (ms) per tool and span
+    """
+    return metrics.format_report()
 
 
 # @mcp.tool()
@@ -236,8 +675,26 @@ if __name__ == "__main__":
     parser.add_argument("--transport", type=str, default="stdio", choices=["stdio", "http"], help="Transport protocol (default: stdio)")
     parser.add_argument("--host", type=str, default="127.0.0.1", help="HTTP host (default: 127.0.0.1)")
     parser.add_argument("--port", type=int, default=8001, help="HTTP port (default: 8000)")
+    parser.add_argument("--metrics-port", type=int, default=None, help="Serve Prometheus metrics on this port (default: disabled)")
+    parser.add_argument("--collection", action="append", default=[], metavar="NAME=DOCUMENTS_DIR", help="Register an extra document collection (repeatable)")
+    parser.add_argument("--max-loaded-collections", type=int, default=None, help="Collections kept in memory at once (default: 4)")
     args = parser.parse_args()
 
+    if args.metrics_port is not None:
+        start_metrics_http_server(metrics, host=args.host, port=args.metrics_port)
+
+    registry = get_registry()
+    for spec in args.collection:
+        name, _, documents_dir = spec.partition("=")
+        if not documents_dir:
+            parser.error(f"--collection expects NAME=DOCUMENTS_DIR, got '{spec}'")
+        try:
+            registry.register(name, documents_dir)
+        except ValueError as e:
+            parser.error(f"--collection: {e}")
+    if args.max_loaded_collections is not None:
+        registry.max_loaded = max(1, args.max_loaded_collections)
+    
     get_rag_instance(force_reload=False)
     # get_rag_instance(force_reload=args.force_reload)
            
@@ -0,0 +1,149 @@
+import json
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Response formats accepted by the MCP tools
+TEXT = "text"
+COMPACT = "compact"
+RESPONSE_FORMATS = (TEXT, COMPACT)
+
+# Rough chars-per-token ratio used to turn a token budget into a character budget
+CHARS_PER_TOKEN = 4
+
+
+def invalid_format_message(response_format: str) -> Optional[str]:
+    """Return an error message if response_format is not supported, else None"""
+    if response_format in RESPONSE_FORMATS:
+        return None
+    return f"Invalid response_format '{response_format}'. Valid options: {list(RESPONSE_FORMATS)}"
+
+
+def compact_json(obj: Any) -> str:
+    """Serialize without whitespace to minimize transfer size and token count"""
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+
+def char_budget(max_chars: int = 0, max_tokens: int = 0) -> int:
+    """Combine a character and a token budget into one character limit (0 = unlimited)"""
+    limits = [limit for limit in (max_chars, max_tokens * CHARS_PER_TOKEN) if limit > 0]
+    return min(limits) if limits else 0
+
+
+def truncate(text: str, max_chars: int = 0) -> str:
+    """Cut text to max_chars (0 = unlimited), marking how much was dropped"""
+    if max_chars <= 0 or len(text) <= max_chars:
+        return text
+    # The marker displaces text too, so count it in the dropped total (its width can grow a digit)
+    dropped = len(text) - max_chars
+    while True:
+        marker = f"\n...[truncated {dropped} chars]"
+        keep = max_chars - len(marker)
+        if keep <= 0:
+            # No room for the marker, a plain cut still respects the budget
+            return text[:max_chars]
+        if len(text) - keep == dropped:
+            return text[:keep] + marker
+        dropped = len(text) - keep
+
+
+def paginate(items: Sequence, offset: int = 0, limit: int = 0) -> Tuple[Sequence, int]:
+    """Return (page, start) for items[offset:offset+limit] (limit 0 = everything from offset)"""
+    start = max(0, offset)
+    end = len(items) if limit <= 0 else min(len(items), start + limit)
+    return items[start:end], start
+
+
+class CatalogRenderer:
+    """
+    Precomputed text/compact renderings of a process catalog.
+
+    Per-process text blocks and compact entries are built once; the full-catalog
+    strings are cached so repeated get_valid_processes calls are a dict lookup.
+    """
+    def __init__(self, processes: List[List[Tuple[str, str]]]):
+        self.total = len(processes)
+        self._text_blocks = []
+        for process_idx, process in enumerate(processes, 1):
+            lines = [f"\nProcess {process_idx}:"]
+            for step_idx, (block, param) in enumerate(process, 1):
+                lines.append(f"  Step {step_idx}: {block} ({param})")
+            self._text_blocks.append("\n".join(lines))
+
+        # Write the block order once when every process shares it, so entries are just sub-params
+        block_orders = {tuple(block for block, _ in process) for process in processes}
+        self._blocks = list(next(iter(block_orders))) if len(block_orders) == 1 else None
+        if self._blocks is not None:
+            self._entries = [[param for _, param in process] for process in processes]
+        else:
+            self._entries = [[[block, param] for block, param in process] for process in processes]
+
+        self._full = {
+            TEXT: "\n".join(["Valid Processes:\n"] + self._text_blocks),
+            COMPACT: self._render_compact(0, self._entries),
+        }
+
+    def _render_compact(self, start: int, entries: Sequence, next_offset: Optional[int] = None) -> str:
+        payload: Dict[str, Any] = {"total": self.total, "offset": start}
+        if self._blocks is not None:
+            payload["blocks"] = self._blocks
+        payload["processes"] = {str(start + i + 1): entry for i, entry in enumerate(entries)}
+        if next_offset is not None:
+            payload["next_offset"] = next_offset
+        return compact_json(payload)
+
+    def _render_text(self, start: int, blocks: Sequence, next_offset: Optional[int] = None) -> str:
+        if not blocks:
+            return f"Valid Processes: none at offset {start} (total {self.total})"
+        header = f"Valid Processes {start + 1}-{start + len(blocks)} of {self.total}:\n"
+        lines = [header] + list(blocks)
+        if next_offset is not None:
+            lines.append(f"\n...more processes available, call again with offset={next_offset}")
+        return "\n".join(lines)
+
+    def render(self, response_format: str = TEXT, offset: int = 0, limit: int = 0, max_chars: int = 0) -> str:
+        """
+        Render processes [offset, offset+limit) (limit 0 = all). With max_chars, whole
+        processes are dropped from the end of the page until it fits and the response
+        says which offset to continue from; if no process fits, an error is returned.
+        """
+        full_page = offset <= 0 and (limit <= 0 or limit >= self.total)
+        if full_page and (max_chars <= 0 or len(self._full[response_format]) <= max_chars):
+            return self._full[response_format]
+
+        items = self._entries if response_format == COMPACT else self._text_blocks
+        page, start = paginate(items, offset, limit)
+        render = self._render_compact if response_format == COMPACT else self._render_text
+        end = start + len(page)
+        next_offset = end if end < self.total else None
+        result = render(start, page, next_offset)
+
+        if max_chars > 0 and len(result) > max_chars:
+            # Find the largest prefix of the page that fits the budget. Any prefix shorter
+            # than the page continues at start + n, which is always past the requested offset.
+            low, high = 0, len(page)
+            while low < high:
+                mid = (low + high + 1) // 2
+                if len(render(start, page[:mid], start + mid)) <= max_chars:
+                    low = mid
+                else:
+                    high = mid - 1
+            if low == 0:
+                # Not even one process fits: fail clearly instead of sending a page that
+                # can't be continued or that is cut in the middle of a process
+                first_end = start + 1
+                needed = len(render(start, page[:1], first_end if first_end < self.total else None))
+                return f"max_chars too small to return process {start + 1}, need >= {needed}"
+            result = render(start, page[:low], start + low)
+        return result
+
+
+_catalog_renderers: Dict[int, Tuple[List, int, CatalogRenderer]] = {}
+
+
+def catalog_renderer(processes: List[List[Tuple[str, str]]]) -> CatalogRenderer:
+    """Return the cached renderer for this catalog, rebuilding it if the catalog changed"""
+    cached = _catalog_renderers.get(id(processes))
+    if cached is None or cached[0] is not processes or cached[1] != len(processes):
+        cached = (processes, len(processes), CatalogRenderer(processes))
+        _catalog_renderers.clear()
+        _catalog_renderers[id(processes)] = cached
+    return cached[2]